@@ -17,6 +17,9 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_SERVICE_KEY: str
 
+    # ─── Emotion Model ───
+    EMOTION_MODEL_DIR: str = "models/emotion"
+
     # ─── App ───
     ENVIRONMENT: str = "development"
     FRONTEND_URL: str = "http://localhost:3000"
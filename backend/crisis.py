@@ -11,7 +11,7 @@ When crisis is detected, the system encourages the user to seek
 real professional help and provides helpline numbers.
 """
 
-import re
+import ahocorasick
 
 
 # ─── Crisis Keywords ────────────────────────────────────────────
@@ -37,6 +37,16 @@ CRISIS_KEYWORDS = [
     "not worth living",
 ]
 
+# Built once at import: an Aho-Corasick automaton over all phrases, so a
+# message is scanned in one linear pass however many keywords there are.
+_CRISIS_AUTOMATON = ahocorasick.Automaton()
+for _keyword in CRISIS_KEYWORDS:
+    _CRISIS_AUTOMATON.add_word(_keyword, _keyword)
+_CRISIS_AUTOMATON.make_automaton()
+
+# Messages shorter than the shortest phrase can't match; skip the scan.
+_MIN_KEYWORD_LEN = min(len(keyword) for keyword in CRISIS_KEYWORDS)
+
 # ─── Crisis Support Message ─────────────────────────────────────
 CRISIS_MESSAGE = """
 🆘 **I hear you, and I care about your safety.**
@@ -60,41 +70,45 @@ SOFT_RISK_EMOTIONS = {
 }
 
 
-def detect_crisis(
-    text: str,
-    emotion_label: str = None,
-    emotion_confidence: float = None
-) -> tuple[bool, str | None]:
+def detect_crisis_keywords(text: str, normalized: str = None) -> bool:
     """
-    Detect if a message indicates a mental health crisis.
+    Keyword-only crisis check (no emotion needed).
     
-    Uses two methods:
-      1. Keyword matching: scans for explicit crisis phrases
-      2. Emotion threshold: checks if sadness/fear confidence is dangerously high
+    Cheap enough to run before emotion detection, so a clear keyword hit
+    doesn't have to wait on the emotion model.
     
     Args:
         text: The user's message
-        emotion_label: Detected emotion (from emotion.py)
-        emotion_confidence: Confidence score for the detected emotion
+        normalized: The message already stripped + lowercased by the caller
+                    (skips lowercasing it again here)
     
     Returns:
-        Tuple of (is_crisis: bool, crisis_message: str | None)
-        If crisis is detected, crisis_message contains the support info.
+        True if the message contains an explicit crisis phrase
+    """
+    # Phrase matching reduces false positives
+    # e.g., "killing time" shouldn't trigger, but "kill myself" should
+    if len(text) < _MIN_KEYWORD_LEN:
+        return False
+    if normalized is None:
+        normalized = text.lower()
+    for _ in _CRISIS_AUTOMATON.iter(normalized):
+        return True
+    return False
+
+
+def detect_emotion_risk(emotion_label: str = None, emotion_confidence: float = None) -> bool:
     """
-    text_lower = text.lower().strip()
+    Emotion-threshold crisis check: is sadness/fear confidence dangerously high?
     
-    # ── Method 1: Keyword Detection ──
-    for keyword in CRISIS_KEYWORDS:
-        # Use word boundary matching to reduce false positives
-        # e.g., "killing time" shouldn't trigger, but "kill myself" should
-        pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-        if pattern.search(text_lower):
-            return True, CRISIS_MESSAGE
+    Args:
+        emotion_label: Detected emotion (from emotion.py)
+        emotion_confidence: Confidence score for the detected emotion
     
-    # ── Method 2: Emotion Threshold Detection ──
+    Returns:
+        True if the emotion exceeds its soft-risk threshold
+    """
     if emotion_label and emotion_confidence:
         threshold = SOFT_RISK_EMOTIONS.get(emotion_label)
         if threshold and emotion_confidence >= threshold:
-            return True, CRISIS_MESSAGE
-    
-    return False, None
+            return True
+    return False
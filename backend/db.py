@@ -5,20 +5,22 @@ Uses direct HTTP calls to the Supabase PostgREST API instead of the
 Python SDK, avoiding dependency conflicts with gotrue/httpx/httpcore.
 
 Handles all database operations:
-  - Saving chat messages (user + AI)
-  - Saving mood logs (emotion + confidence)
-  - Fetching mood history for analytics
-  - Fetching recent chats for conversation memory
+  - Saving a whole chat turn (user + AI messages, mood log) in one RPC call
+  - Fetching daily mood aggregates for analytics
+  - Fetching recent chats for conversation memory (cached in-process)
 """
 
 
 import httpx
+import orjson
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from config import settings
 
 
 # ─── Supabase REST helpers ───────────────────────────────────────
 # Using the service key to bypass RLS (backend acts on behalf of users)
+# created_at is never sent: Postgres fills it with DEFAULT NOW()
 
 HEADERS = {
     "apikey": settings.SUPABASE_SERVICE_KEY,
@@ -29,51 +31,91 @@ HEADERS = {
 
 BASE_URL = f"{settings.SUPABASE_URL}/rest/v1"
 
+# One pooled client for the whole process so TCP + TLS connections to
+# Supabase are reused across requests instead of re-handshaking per call.
+_client = httpx.AsyncClient(
+    base_url=BASE_URL,
+    headers=HEADERS,
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+    timeout=10.0,
+)
 
-def _request(method: str, table: str, **kwargs) -> list:
+
+async def _request(method: str, table: str, **kwargs) -> list:
     """Make a request to the Supabase REST API."""
-    url = f"{BASE_URL}/{table}"
-    resp = httpx.request(method, url, headers=HEADERS, **kwargs)
+    resp = await _client.request(method, f"/{table}", **kwargs)
     resp.raise_for_status()
-    return resp.json() if resp.text else []
+    return orjson.loads(resp.content) if resp.content else []
 
 
-# ─── Chat Operations ────────────────────────────────────────────
+async def close_client() -> None:
+    """Close the shared Supabase client (called on app shutdown)."""
+    await _client.aclose()
 
-def save_chat_message(
-    user_id: str,
-    role: str,          # "user" or "assistant"
-    message: str,
-    emotion: str = None
-) -> dict:
-    """
-    Save a single chat message to the 'chats' table.
-    
-    Args:
-        user_id: The authenticated user's ID
-        role: Either "user" or "assistant"
-        message: The message text
-        emotion: Detected emotion label (optional)
+
+# ─── Recent Chat Cache ──────────────────────────────────────────
+# The backend writes every chat turn itself, so it can keep each user's
+# last few messages in memory and skip the history fetch on the next turn.
+# Bounded per user (deque) and across users (LRU eviction). Misses fall
+# back to Supabase. Per-process: assumes one worker per user's traffic.
+HISTORY_CACHE_MESSAGES = 10
+HISTORY_CACHE_USERS = 10_000
+
+_history_cache: OrderedDict[str, deque] = OrderedDict()
+
+# A miss fills the cache from a DB snapshot taken across an await. If one of
+# the user's writes overlaps that fetch, the snapshot may or may not contain
+# it (and the write's append can't land on an entry that doesn't exist yet),
+# so such a snapshot is returned but not cached; the next turn refetches.
+_writes_in_flight: dict[str, int] = {}
+_fills_in_flight: dict[str, list] = {}  # user_id -> [fetch count, saw a write]
+
+
+def _cache_history(user_id: str, chats: list[dict]) -> None:
+    _history_cache[user_id] = deque(chats, maxlen=HISTORY_CACHE_MESSAGES)
+    _history_cache.move_to_end(user_id)
+    if len(_history_cache) > HISTORY_CACHE_USERS:
+        _history_cache.popitem(last=False)
+
+
+def _mark_fill_stale(user_id: str) -> None:
+    fill = _fills_in_flight.get(user_id)
+    if fill is not None:
+        fill[1] = True
+
+
+def _begin_write(user_id: str) -> None:
+    """Call before writing chats for a user."""
+    _writes_in_flight[user_id] = _writes_in_flight.get(user_id, 0) + 1
+    _mark_fill_stale(user_id)
+
+
+def _end_write(user_id: str, *chats: dict) -> None:
+    """Call after the write; appends the saved messages if history is cached."""
+    remaining = _writes_in_flight[user_id] - 1
+    if remaining:
+        _writes_in_flight[user_id] = remaining
+    else:
+        del _writes_in_flight[user_id]
+    _mark_fill_stale(user_id)
     
-    Returns:
-        The inserted row as a dict
-    """
-    data = {
-        "user_id": user_id,
-        "role": role,
-        "message": message,
-        "emotion": emotion,
-        "created_at": datetime.utcnow().isoformat()
-    }
-    result = _request("POST", "chats", json=data)
-    return result[0] if result else {}
+    history = _history_cache.get(user_id)
+    if history is not None:
+        history.extend(chats)
+
 
+# ─── Chat Operations ────────────────────────────────────────────
 
-def get_recent_chats(user_id: str, limit: int = 10) -> list:
+async def get_recent_chats(user_id: str, limit: int = 10) -> list:
     """
     Fetch the most recent chat messages for a user.
     Used to build conversation context for the LLM.
     
+    Served from the in-memory cache when possible; on a miss the last
+    HISTORY_CACHE_MESSAGES are fetched from Supabase and cached (unless a
+    write for this user overlapped the fetch).
+    
     Args:
         user_id: The authenticated user's ID
         limit: Max number of messages to return (default 10 = 5 pairs)
@@ -81,65 +123,100 @@ def get_recent_chats(user_id: str, limit: int = 10) -> list:
     Returns:
         List of chat dicts, ordered oldest → newest
     """
+    history = _history_cache.get(user_id)
+    if history is not None and limit <= HISTORY_CACHE_MESSAGES:
+        _history_cache.move_to_end(user_id)
+        return list(history)[-limit:]
+    
     params = {
         "select": "role,message",
         "user_id": f"eq.{user_id}",
         "order": "created_at.desc",
-        "limit": str(limit),
+        "limit": str(max(limit, HISTORY_CACHE_MESSAGES)),
     }
-    result = _request("GET", "chats", params=params)
+    fill = _fills_in_flight.setdefault(user_id, [0, False])
+    fill[0] += 1
+    if user_id in _writes_in_flight:
+        fill[1] = True
+    try:
+        result = await _request("GET", "chats", params=params)
+    finally:
+        fill[0] -= 1
+        if fill[0] == 0:
+            _fills_in_flight.pop(user_id, None)
+    
     # Reverse so oldest messages come first (for LLM context)
-    return list(reversed(result)) if result else []
+    chats = list(reversed(result)) if result else []
+    if not fill[1]:
+        _cache_history(user_id, chats[-HISTORY_CACHE_MESSAGES:])
+    return chats[-limit:]
 
 
-# ─── Mood Operations ────────────────────────────────────────────
+# ─── Chat Turn (RPC) ────────────────────────────────────────────
 
-def save_mood_log(
+async def save_turn(
     user_id: str,
+    user_message: str,
+    ai_message: str,
     emotion: str,
     confidence: float
-) -> dict:
+) -> None:
     """
-    Save an emotion detection result to the 'mood_logs' table.
-    Called every time the user sends a message.
+    Persist a full chat turn in one request via the insert_chat_turn RPC.
+    Inserts the user message, the AI reply and the mood log atomically.
     
     Args:
         user_id: The authenticated user's ID
-        emotion: Detected emotion label (e.g., "sadness")
+        user_message: The user's message text
+        ai_message: The AI's reply text
+        emotion: Detected emotion label for the user message
         confidence: Model confidence score (0.0 – 1.0)
-    
-    Returns:
-        The inserted row as a dict
     """
     data = {
-        "user_id": user_id,
-        "emotion": emotion,
-        "confidence": confidence,
-        "created_at": datetime.utcnow().isoformat()
+        "p_user_id": user_id,
+        "p_user_msg": user_message,
+        "p_ai_msg": ai_message,
+        "p_emotion": emotion,
+        "p_confidence": confidence,
     }
-    result = _request("POST", "mood_logs", json=data)
-    return result[0] if result else {}
+    _begin_write(user_id)
+    try:
+        await _request("POST", "rpc/insert_chat_turn", content=orjson.dumps(data))
+    except Exception:
+        _end_write(user_id)
+        raise
+    _end_write(
+        user_id,
+        {"role": "user", "message": user_message},
+        {"role": "assistant", "message": ai_message},
+    )
+
 
+# ─── Mood Operations ────────────────────────────────────────────
 
-def get_mood_history(user_id: str, days: int = 30) -> list:
+async def get_mood_history(user_id: str, days: int = 30) -> list:
     """
-    Fetch mood logs for a user within the last N days.
+    Fetch daily emotion counts for a user within the last N days.
     Used for the mood analytics dashboard.
     
+    Reads the pre-aggregated 'mood_daily' view, so this returns at most
+    one row per (day, emotion) rather than every mood log.
+    
     Args:
         user_id: The authenticated user's ID
         days: Number of days to look back (default 30)
     
     Returns:
-        List of mood_log dicts with emotion, confidence, and timestamp
+        List of dicts with day, emotion and count, ordered by day
     """
-    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    # Whole UTC days: the last `days` calendar days, today included
+    cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
     
     params = {
-        "select": "emotion,confidence,created_at",
+        "select": "day,emotion,count",
         "user_id": f"eq.{user_id}",
-        "created_at": f"gte.{cutoff}",
-        "order": "created_at.asc",
+        "day": f"gt.{cutoff}",
+        "order": "day.asc",
     }
-    result = _request("GET", "mood_logs", params=params)
+    result = await _request("GET", "mood_daily", params=params)
     return result if result else []
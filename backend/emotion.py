@@ -1,21 +1,170 @@
 """
-emotion.py – Emotion detection using LLM (Lightweight).
+emotion.py – Emotion detection using a local int8 ONNX model.
 
-Replaces the heavy HuggingFace Transformers model with an API call 
-to OpenRouter (via llm.classify_emotion). This saves ~500MB RAM.
+Runs j-hartmann/emotion-english-distilroberta-base through ONNX Runtime,
+quantized to int8 (see export_emotion_model.py). Compared to the FP32
+PyTorch pipeline this is ~4x faster on CPU and uses ~80MB instead of
+~320MB RAM, with no network round-trip per message.
+
+The session and tokenizer are loaded once at import time; concurrent
+calls are micro-batched into a single forward pass.
 """
 
-from llm import classify_emotion
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Model Loading (singleton) ──────────────────────────────────
+MODEL_DIR = settings.EMOTION_MODEL_DIR
+MODEL_PATH = os.path.join(MODEL_DIR, "model.int8.onnx")
+
+_session = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
+_tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR)
+_input_names = {inp.name for inp in _session.get_inputs()}
+
+with open(os.path.join(MODEL_DIR, "config.json"), encoding="utf-8") as f:
+    _id2label = {int(k): v for k, v in json.load(f)["id2label"].items()}
+
+
+# ─── Result Cache (LRU) ─────────────────────────────────────────
+# Short messages ("ok", "thanks", "hi") repeat a lot; cache their results
+# keyed by a hash of the normalized text so repeats skip inference.
+CACHE_SIZE = 2048
+
+_cache: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+
+
+def _cache_key(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+
+# ─── Micro-batching ─────────────────────────────────────────────
+# Concurrent requests are collected for up to BATCH_WINDOW seconds (or
+# until MAX_BATCH_SIZE) and classified in one padded forward pass, which
+# costs far less than running each message on its own.
+BATCH_WINDOW = 0.01
+MAX_BATCH_SIZE = 16
+
+_queue: asyncio.Queue | None = None
+_worker: asyncio.Task | None = None
+
+
+def _classify_batch(texts: list[str]) -> list[tuple[str, float]]:
+    """Run one batched forward pass and return (label, confidence) per text."""
+    encoded = _tokenizer(
+        texts, padding=True, truncation=True, max_length=512, return_tensors="np"
+    )
+    feeds = {name: arr.astype(np.int64) for name, arr in encoded.items() if name in _input_names}
+    logits = _session.run(None, feeds)[0]
 
-async def detect_emotion(text: str) -> tuple[str, float]:
+    # Softmax → probabilities (row-wise)
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probs = exp / exp.sum(axis=1, keepdims=True)
+
+    best = probs.argmax(axis=1)
+    return [
+        (_id2label[int(idx)], round(float(row[idx]), 4))
+        for row, idx in zip(probs, best)
+    ]
+
+
+async def _batch_worker():
+    """Background task: drain the queue in batches and resolve each future."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+
+        while len(batch) < MAX_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in batch]
+        try:
+            results = await asyncio.to_thread(_classify_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _ensure_worker():
+    """Start the batch worker on the running loop if it isn't running yet."""
+    global _queue, _worker
+    if _worker is None or _worker.done():
+        _queue = asyncio.Queue()
+        _worker = asyncio.create_task(_batch_worker())
+
+
+async def stop_batcher() -> None:
+    """Cancel the batch worker (called on app shutdown)."""
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+
+
+async def detect_emotion(text: str, normalized: str = None) -> tuple[str, float]:
     """
-    Detect emotion using LLM (Async).
-    
+    Detect emotion with the local ONNX model (Async).
+
+    Repeated messages are served from the LRU cache. Otherwise the
+    message is queued for the micro-batcher; inference itself runs in
+    a worker thread to keep the event loop free.
+
     Args:
         text: The user's message text
-    
+        normalized: The message already stripped + lowercased by the caller,
+                    used as the cache key (computed here if not given)
+
     Returns:
         Tuple of (emotion_label, confidence_score)
         Example: ("sadness", 0.9)
     """
-    return await classify_emotion(text)
+    if normalized is None:
+        normalized = text.strip().lower()
+    key = _cache_key(normalized)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+
+    _ensure_worker()
+    future = asyncio.get_running_loop().create_future()
+    await _queue.put((text, future))
+    try:
+        result = await future
+    except Exception as e:
+        logger.warning("⚠️ Emotion detection failed: %s", e)
+        return "neutral", 0.0
+
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
@@ -0,0 +1,44 @@
+"""
+export_emotion_model.py – One-time export of the emotion model to int8 ONNX.
+
+Exports j-hartmann/emotion-english-distilroberta-base to ONNX and applies
+dynamic int8 quantization, writing everything emotion.py needs
+(model.int8.onnx, tokenizer files, config.json) to EMOTION_MODEL_DIR.
+
+Export-only dependencies (not needed at runtime):
+    pip install "optimum[exporters]" onnx
+
+Run with: python export_emotion_model.py
+"""
+
+import os
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from optimum.onnxruntime import ORTModelForSequenceClassification
+from transformers import AutoTokenizer
+
+from config import settings
+
+MODEL_ID = "j-hartmann/emotion-english-distilroberta-base"
+
+
+def main():
+    out_dir = settings.EMOTION_MODEL_DIR
+    os.makedirs(out_dir, exist_ok=True)
+
+    print(f"📦 Exporting {MODEL_ID} to ONNX...")
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_ID, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(MODEL_ID).save_pretrained(out_dir)
+
+    print("⚙️ Quantizing weights to int8...")
+    quantize_dynamic(
+        os.path.join(out_dir, "model.onnx"),
+        os.path.join(out_dir, "model.int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+    print(f"✅ Model written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
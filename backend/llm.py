@@ -7,14 +7,41 @@ Uses mistralai/mistral-7b-instruct as the default free model.
 Features:
   - Strong system prompt enforcing ethical boundaries
   - Conversation memory (last 5 message pairs)
+  - Streaming responses (SSE) for fast time-to-first-token
   - Crisis-aware response augmentation
 """
 
+import logging
+from typing import AsyncIterator
+
 import httpx
+import orjson
+import tiktoken
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # ─── OpenRouter Configuration ───────────────────────────────────
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# One pooled client for the whole process so the TLS connection to
+# OpenRouter is reused across chat turns instead of re-handshaking.
+_llm_client = httpx.AsyncClient(
+    base_url=OPENROUTER_BASE_URL,
+    headers={
+        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": settings.FRONTEND_URL,
+    },
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=10),
+    timeout=30.0,
+)
+
+
+async def close_client() -> None:
+    """Close the shared OpenRouter client (called on app shutdown)."""
+    await _llm_client.aclose()
 
 # ─── System Prompt ──────────────────────────────────────────────
 # This prompt defines MindMitra's personality and ethical boundaries.
@@ -39,33 +66,81 @@ GOAL:
 """
 
 
-async def get_ai_response(
-    user_message: str,
-    chat_history: list[dict],
-    crisis_detected: bool = False,
-    crisis_message: str = None
-) -> str:
+# ─── Prompt Size Limits ─────────────────────────────────────────
+# Prompt length drives time-to-first-token and cost, so past messages
+# are capped per message and as a whole before being sent.
+MAX_HISTORY_MESSAGES = 10
+MAX_HISTORY_MESSAGE_CHARS = 2000
+HISTORY_TOKEN_BUDGET = 1500
+
+# Approximate tokenizer for budgeting. Loaded at startup (it may need a
+# one-time download); until then, or if that fails, tokens are estimated
+# as chars / 4 so the app never depends on the download host.
+_encoding = None
+
+
+def load_tokenizer() -> None:
+    """Load the tiktoken encoding (blocking; run off the event loop)."""
+    global _encoding
+    try:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("⚠️ tiktoken encoding unavailable, estimating tokens as chars/4: %s", e)
+
+
+def _count_tokens(text: str) -> int:
+    if _encoding is None:
+        return len(text) // 4
+    return len(_encoding.encode(text))
+
+
+def _trim_history(chat_history: list[dict]) -> list[dict]:
     """
-    Generate an empathetic AI response using OpenRouter.
+    Keep the most recent messages that fit in HISTORY_TOKEN_BUDGET.
     
-    Args:
-        user_message: The user's current message
-        chat_history: Recent messages for context [{"role": "user/assistant", "message": "..."}]
-        crisis_detected: Whether crisis was detected in the current message
-        crisis_message: Crisis support info to append (if crisis detected)
-    
-    Returns:
-        The AI's response text
+    Walks backwards from the newest message, truncating each one to
+    MAX_HISTORY_MESSAGE_CHARS, and drops everything older once the
+    budget is used up. Returned oldest → newest.
     """
+    trimmed = []
+    tokens_used = 0
+    for chat in reversed(chat_history[-MAX_HISTORY_MESSAGES:]):
+        content = chat["message"][:MAX_HISTORY_MESSAGE_CHARS]
+        tokens = _count_tokens(content)
+        if tokens_used + tokens > HISTORY_TOKEN_BUDGET:
+            break
+        tokens_used += tokens
+        trimmed.append({"role": chat["role"], "content": content})
+    trimmed.reverse()
+    return trimmed
+
+
+class OpenRouterStreamError(Exception):
+    """An error chunk received in the middle of an OpenRouter stream."""
+
+
+# ─── Fallback Replies ───────────────────────────────────────────
+TIMEOUT_REPLY = (
+    "I'm sorry, I'm taking a moment to gather my thoughts. "
+    "Could you please try sending your message again? 💙"
+)
+ERROR_REPLY = (
+    "I'm having a little trouble right now, but I'm here for you. "
+    "Please try again in a moment. 💙"
+)
+
+
+def _build_payload(
+    user_message: str,
+    chat_history: list[dict],
+    crisis_detected: bool
+) -> dict:
+    """Build the OpenRouter chat completion payload for a user message."""
     # ── Build message history for the LLM ──
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     
-    # Add conversation history (last 5 pairs = 10 messages)
-    for chat in chat_history[-10:]:
-        messages.append({
-            "role": chat["role"],
-            "content": chat["message"]
-        })
+    # Add conversation history (last 5 pairs = 10 messages, token-capped)
+    messages.extend(_trim_history(chat_history))
     
     # Add the current user message
     # If crisis detected, add context so the LLM responds appropriately
@@ -80,15 +155,7 @@ async def get_ai_response(
     else:
         messages.append({"role": "user", "content": user_message})
     
-    # ── Call OpenRouter API ──
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": settings.FRONTEND_URL,
-        "X-Title": "MindMitra AI Companion",
-    }
-    
-    payload = {
+    return {
         "model": settings.OPENROUTER_MODEL,
         "messages": messages,
         "max_tokens": 500,
@@ -96,90 +163,141 @@ async def get_ai_response(
         "top_p": 0.9,
         "frequency_penalty": 0.3,   # Reduce repetition
     }
+
+
+async def get_ai_response(
+    user_message: str,
+    chat_history: list[dict],
+    crisis_detected: bool = False,
+    crisis_message: str = None
+) -> str:
+    """
+    Generate an empathetic AI response using OpenRouter.
+    
+    Args:
+        user_message: The user's current message
+        chat_history: Recent messages for context [{"role": "user/assistant", "message": "..."}]
+        crisis_detected: Whether crisis was detected in the current message
+        crisis_message: Crisis support info to append (if crisis detected)
+    
+    Returns:
+        The AI's response text
+    """
+    headers = {"X-Title": "MindMitra AI Companion"}
+    payload = _build_payload(user_message, chat_history, crisis_detected)
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                OPENROUTER_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            ai_reply = data["choices"][0]["message"]["content"].strip()
-            
-            # If crisis detected, append the crisis support message
-            if crisis_detected and crisis_message:
-                ai_reply = f"{ai_reply}\n\n{crisis_message}"
-            
-            return ai_reply
+        response = await _llm_client.post(
+            "/chat/completions",
+            headers=headers,
+            content=orjson.dumps(payload)
+        )
+        response.raise_for_status()
+        
+        data = orjson.loads(response.content)
+        ai_reply = data["choices"][0]["message"]["content"].strip()
+        
+        # If crisis detected, append the crisis support message
+        if crisis_detected and crisis_message:
+            ai_reply = f"{ai_reply}\n\n{crisis_message}"
+        
+        return ai_reply
             
     except httpx.TimeoutException:
-        return (
-            "I'm sorry, I'm taking a moment to gather my thoughts. "
-            "Could you please try sending your message again? 💙"
-        )
+        return TIMEOUT_REPLY
     except httpx.HTTPStatusError as e:
-        print(f"❌ OpenRouter API error: {e.response.status_code} – {e.response.text}")
-        return (
-            "I'm having a little trouble right now, but I'm here for you. "
-            "Please try again in a moment. 💙"
-        )
+        logger.error("❌ OpenRouter API error: %s – %s", e.response.status_code, e.response.text)
+        return ERROR_REPLY
     except Exception as e:
-        print(f"❌ Unexpected error in LLM call: {e}")
-async def classify_emotion(text: str) -> tuple[str, float]:
+        logger.error("❌ Unexpected error in LLM call: %s", e)
+        return ERROR_REPLY
+
+
+async def stream_ai_response(
+    user_message: str,
+    chat_history: list[dict],
+    crisis_detected: bool = False,
+    crisis_message: str = None
+) -> AsyncIterator[str]:
     """
-    Classify the emotion of a text using the LLM (lightweight alternative to local BERT).
+    Stream an empathetic AI response from OpenRouter, chunk by chunk.
     
-    Args:
-        text: User message
-        
-    Returns:
-        tuple: (emotion_label, confidence_score)
-    """
-    prompt = (
-        f"Classify the emotion of this text into exactly one of these labels: "
-        f"anger, disgust, fear, joy, neutral, sadness, surprise.\n"
-        f"Text: \"{text}\"\n"
-        f"Reply ONLY with the label."
-    )
+    Same inputs as get_ai_response, but yields text deltas as the model
+    produces them (SSE), so the client sees the first words right away.
+    The crisis support message, if any, is yielded as the final chunk.
     
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": settings.FRONTEND_URL,
-        "X-Title": "MindMitra Emotion Classifier",
-    }
+    Errors before the first chunk yield a fallback reply instead. Errors
+    after it are re-raised, since the partial reply can't be taken back.
     
-    payload = {
-        "model": settings.OPENROUTER_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 10,
-        "temperature": 0.1,  # Deterministic
-    }
+    Yields:
+        Pieces of the AI's response text
+    """
+    headers = {"X-Title": "MindMitra AI Companion"}
+    payload = _build_payload(user_message, chat_history, crisis_detected)
+    payload["stream"] = True
     
+    streamed_any = False
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                OPENROUTER_URL,
-                headers=headers,
-                json=payload
-            )
+        async with _llm_client.stream(
+            "POST",
+            "/chat/completions",
+            headers=headers,
+            content=orjson.dumps(payload)
+        ) as response:
+            if response.is_error:
+                await response.aread()
             response.raise_for_status()
-            data = response.json()
-            label = data["choices"][0]["message"]["content"].strip().lower()
             
-            # clean up punctuation
-            import re
-            label = re.sub(r'[^a-z]', '', label)
-            
-            valid_labels = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
-            if label not in valid_labels:
-                return "neutral", 0.5
+            async for line in response.aiter_lines():
+                # SSE: "data: {json}" lines; ":"-prefixed lines are keep-alives
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
                 
-            return label, 0.9  # Mock confidence since LLM doesn't give it easily
-            
+                chunk = orjson.loads(data)
+                
+                # OpenRouter reports mid-stream failures as in-band error chunks
+                if "error" in chunk:
+                    logger.error("❌ OpenRouter stream error: %s", chunk["error"])
+                    raise OpenRouterStreamError(chunk["error"])
+                
+                # Some chunks (e.g. usage) carry no choices
+                choices = chunk.get("choices")
+                if not choices:
+                    continue
+                
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    # Match get_ai_response, which strips leading whitespace
+                    if not streamed_any:
+                        delta = delta.lstrip()
+                        if not delta:
+                            continue
+                    streamed_any = True
+                    yield delta
+    
+    except httpx.TimeoutException:
+        if streamed_any:
+            raise
+        yield TIMEOUT_REPLY
+    except httpx.HTTPStatusError as e:
+        logger.error("❌ OpenRouter API error: %s – %s", e.response.status_code, e.response.text)
+        if streamed_any:
+            raise
+        yield ERROR_REPLY
+    except OpenRouterStreamError:
+        # Already logged where the error chunk was read
+        if streamed_any:
+            raise
+        yield ERROR_REPLY
     except Exception as e:
-        print(f"⚠️ Emotion classification failed: {e}")
-        return "neutral", 0.0
+        logger.error("❌ Unexpected error in LLM stream: %s", e)
+        if streamed_any:
+            raise
+        yield ERROR_REPLY
+    
+    # If crisis detected, append the crisis support message
+    if crisis_detected and crisis_message:
+        yield f"\n\n{crisis_message}"
@@ -2,11 +2,16 @@
 main.py – FastAPI application for MindMitra AI Mental Health Companion.
 
 This is the entry point for the backend server.
-It configures CORS, rate limiting, and registers all routes.
+It configures logging, CORS, rate limiting, and registers all routes.
 
 Run with: uvicorn main:app --reload
 """
 
+import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -15,10 +20,40 @@ from slowapi.errors import RateLimitExceeded
 from contextlib import asynccontextmanager
 
 from config import settings
+from db import close_client as close_db_client
+from emotion import stop_batcher as stop_emotion_batcher
+from llm import close_client as close_llm_client, load_tokenizer
 from routes.chat import router as chat_router
 from routes.mood import router as mood_router
 
 
+# ─── Logging Setup ──────────────────────────────────────────────
+# Log calls only enqueue records; a background thread (the listener)
+# formats and writes them, so the event loop never blocks on stdout.
+class _RawQueueHandler(QueueHandler):
+    """
+    Enqueue the record untouched. The stock prepare() formats it (including
+    %-interpolation) on the calling thread; here the listener does that.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+
+logging.basicConfig(level=logging.INFO, handlers=[_RawQueueHandler(_log_queue)])
+logger = logging.getLogger(__name__)
+
+# httpx/httpcore log every request at INFO, URLs included (with user IDs);
+# keep them to warnings so the hot path stays quiet and IDs stay out of logs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+
 # ─── Rate Limiter Setup ─────────────────────────────────────────
 limiter = Limiter(key_func=get_remote_address)
 
@@ -31,11 +66,17 @@ async def lifespan(app: FastAPI):
     The emotion model is loaded at import time (in emotion.py),
     so it's ready by the time the app starts serving requests.
     """
-    print("🧠 MindMitra backend is starting up...")
-    print(f"🌍 Environment: {settings.ENVIRONMENT}")
-    print(f"🔗 Frontend URL: {settings.FRONTEND_URL}")
+    _log_listener.start()
+    logger.info("🧠 MindMitra backend is starting up...")
+    logger.info("🌍 Environment: %s", settings.ENVIRONMENT)
+    logger.info("🔗 Frontend URL: %s", settings.FRONTEND_URL)
+    await asyncio.to_thread(load_tokenizer)
     yield
-    print("👋 MindMitra backend is shutting down...")
+    await stop_emotion_batcher()
+    await close_db_client()
+    await close_llm_client()
+    logger.info("👋 MindMitra backend is shutting down...")
+    _log_listener.stop()
 
 
 # ─── Create FastAPI App ─────────────────────────────────────────
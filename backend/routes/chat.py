@@ -8,15 +8,25 @@ POST /chat
   - Generates empathetic AI response
   - Saves everything to Supabase
   - Returns structured response
+
+POST /chat/stream
+  - Same pipeline, but streams the AI response as Server-Sent Events
 """
 
+import asyncio
+import logging
+
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from emotion import detect_emotion
-from crisis import detect_crisis
-from llm import get_ai_response
-from db import save_chat_message, save_mood_log, get_recent_chats
+from crisis import CRISIS_MESSAGE, detect_crisis_keywords, detect_emotion_risk
+from llm import ERROR_REPLY, get_ai_response, stream_ai_response
+from db import save_turn, get_recent_chats
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -38,16 +48,88 @@ class ChatResponse(BaseModel):
     crisis: bool
 
 
+# ─── Shared Pipeline Steps ──────────────────────────────────────
+
+async def _analyze_message(
+    user_id: str,
+    message: str,
+    message_norm: str,
+    keyword_crisis: bool
+) -> tuple[str, float, bool, str | None, list]:
+    """
+    Run everything that has to happen before the LLM call.
+    
+    Args:
+        user_id: The authenticated user's ID
+        message: The user's (stripped) message
+        message_norm: The message lowercased once, shared by both detectors
+        keyword_crisis: Result of detect_crisis_keywords, already run by the caller
+    
+    Returns:
+        Tuple of (emotion_label, confidence, is_crisis, crisis_message, chat_history)
+    """
+    # ── Detect emotion + fetch history (independent, run together) ──
+    (emotion_label, confidence), chat_history = await asyncio.gather(
+        detect_emotion(message, normalized=message_norm),
+        get_recent_chats(user_id, limit=10),
+    )
+    
+    # ── Check for crisis (emotion threshold only matters without a keyword hit) ──
+    is_crisis = keyword_crisis or detect_emotion_risk(emotion_label, confidence)
+    crisis_message = CRISIS_MESSAGE if is_crisis else None
+    
+    return emotion_label, confidence, is_crisis, crisis_message, chat_history
+
+
+async def _crisis_reply(user_id: str, message: str) -> str:
+    """Fetch history and generate the AI reply for a keyword-flagged crisis message."""
+    chat_history = await get_recent_chats(user_id, limit=10)
+    return await get_ai_response(
+        user_message=message,
+        chat_history=chat_history,
+        crisis_detected=True,
+        crisis_message=CRISIS_MESSAGE
+    )
+
+
+# Saves started from a stream are kept referenced here until they finish
+_background_saves: set[asyncio.Task] = set()
+
+
+def _on_save_done(task: asyncio.Task) -> None:
+    _background_saves.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("❌ Failed to save chat turn: %s", task.exception())
+
+
+def _save_in_background(**turn) -> asyncio.Task:
+    """
+    Run save_turn as its own task so it still completes if the client
+    disconnects and the response stream is cancelled mid-way.
+    """
+    task = asyncio.create_task(save_turn(**turn))
+    _background_saves.add(task)
+    task.add_done_callback(_on_save_done)
+    return task
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
 # ─── POST /chat ─────────────────────────────────────────────────
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
     Main chat endpoint. Processes user message through the full pipeline:
-    1. Emotion detection
-    2. Crisis detection
-    3. LLM response generation
-    4. Database persistence
+    1. Crisis keyword check (cheap, runs first)
+    2. Emotion detection (concurrently with history fetch, or with the
+       whole LLM call when a keyword already flagged a crisis)
+    3. Emotion-threshold crisis check
+    4. LLM response generation
+    5. Database persistence
     """
     user_id = request.user_id
     message = request.message.strip()
@@ -56,54 +138,47 @@ async def chat(request: ChatRequest):
     if not message:
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
+    # Normalize once; both the crisis scan and the emotion cache reuse it
+    message_norm = message.lower()
+    
     try:
-        # ── Step 1: Detect emotion ──
-        emotion_label, confidence = await detect_emotion(message)
-        
-        # ── Step 2: Check for crisis ──
-        is_crisis, crisis_message = detect_crisis(
-            text=message,
-            emotion_label=emotion_label,
-            emotion_confidence=confidence
-        )
-        
-        # ── Step 3: Get conversation history for context ──
-        chat_history = get_recent_chats(user_id, limit=10)
+        # ── Step 1: Keyword crisis check ──
+        is_crisis = detect_crisis_keywords(message, normalized=message_norm)
         
-        # ── Step 4: Generate AI response ──
-        ai_reply = await get_ai_response(
-            user_message=message,
-            chat_history=chat_history,
-            crisis_detected=is_crisis,
-            crisis_message=crisis_message
-        )
+        if is_crisis:
+            # ── Step 2: Crisis is already settled, so the emotion label only
+            # feeds the mood log – run it alongside history fetch + LLM call ──
+            (emotion_label, confidence), ai_reply = await asyncio.gather(
+                detect_emotion(message, normalized=message_norm),
+                _crisis_reply(user_id, message),
+            )
+        else:
+            # ── Step 2 + 3: Detect emotion, fetch history, threshold check ──
+            emotion_label, confidence, is_crisis, crisis_message, chat_history = (
+                await _analyze_message(user_id, message, message_norm, keyword_crisis=False)
+            )
+            
+            # ── Step 4: Generate AI response ──
+            ai_reply = await get_ai_response(
+                user_message=message,
+                chat_history=chat_history,
+                crisis_detected=is_crisis,
+                crisis_message=crisis_message
+            )
         
         # ── Step 5: Save to database ──
-        # Save user message
-        save_chat_message(
-            user_id=user_id,
-            role="user",
-            message=message,
-            emotion=emotion_label
-        )
-        
-        # Save AI response
-        save_chat_message(
-            user_id=user_id,
-            role="assistant",
-            message=ai_reply,
-            emotion=None
-        )
-        
-        # Save mood log
-        save_mood_log(
+        # One RPC call inserts both chat rows and the mood log atomically
+        await save_turn(
             user_id=user_id,
+            user_message=message,
+            ai_message=ai_reply,
             emotion=emotion_label,
             confidence=confidence
         )
         
         # ── Step 6: Return response ──
-        return ChatResponse(
+        # Values come from our own pipeline, not user input: skip re-validation
+        return ChatResponse.model_construct(
             reply=ai_reply,
             emotion=emotion_label,
             confidence=confidence,
@@ -111,8 +186,102 @@ async def chat(request: ChatRequest):
         )
         
     except Exception as e:
-        print(f"❌ Error in /chat endpoint: {e}")
+        logger.error("❌ Error in /chat endpoint: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Something went wrong. Please try again."
         )
+
+
+# ─── POST /chat/stream ──────────────────────────────────────────
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat (Server-Sent Events).
+    
+    Events, in order:
+      - "meta":  {"emotion", "confidence", "crisis"} as soon as they're known
+      - "delta": {"content"} for each piece of the AI reply
+      - "done":  {"reply"} with the full reply, after it has been saved
+      - "error": {"detail"} if anything fails mid-stream (no "done" follows)
+    
+    The turn is saved even if the stream fails or the client disconnects,
+    with whatever part of the reply was sent.
+    """
+    user_id = request.user_id
+    message = request.message.strip()
+    
+    # Validate input isn't just whitespace
+    if not message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    # Normalize once; both the crisis scan and the emotion cache reuse it
+    message_norm = message.lower()
+    
+    try:
+        emotion_label, confidence, is_crisis, crisis_message, chat_history = (
+            await _analyze_message(
+                user_id,
+                message,
+                message_norm,
+                detect_crisis_keywords(message, normalized=message_norm)
+            )
+        )
+    except Exception as e:
+        logger.error("❌ Error in /chat/stream endpoint: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Something went wrong. Please try again."
+        )
+    
+    async def event_stream():
+        parts = []
+        failed = False
+        try:
+            yield _sse("meta", {
+                "emotion": emotion_label,
+                "confidence": confidence,
+                "crisis": is_crisis,
+            })
+            
+            async for delta in stream_ai_response(
+                user_message=message,
+                chat_history=chat_history,
+                crisis_detected=is_crisis,
+                crisis_message=crisis_message
+            ):
+                parts.append(delta)
+                yield _sse("delta", {"content": delta})
+        except Exception as e:
+            logger.error("❌ Error in /chat/stream endpoint: %s", e)
+            failed = True
+        finally:
+            # Runs on disconnect too, so the user message + mood log are
+            # never lost; the save itself is a separate, uncancellable task
+            ai_reply = "".join(parts).strip() or ERROR_REPLY
+            save_task = _save_in_background(
+                user_id=user_id,
+                user_message=message,
+                ai_message=ai_reply,
+                emotion=emotion_label,
+                confidence=confidence
+            )
+        
+        if not failed:
+            try:
+                await asyncio.shield(save_task)
+            except Exception:
+                failed = True  # already logged by _on_save_done
+        
+        if failed:
+            yield _sse("error", {"detail": "Something went wrong. Please try again."})
+        else:
+            yield _sse("done", {"reply": ai_reply})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies (e.g. nginx) from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
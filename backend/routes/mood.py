@@ -2,15 +2,18 @@
 routes/mood.py – Mood analytics endpoint for MindMitra.
 
 GET /mood/{user_id}
-  - Fetches mood history from Supabase
-  - Computes emotion distribution (for pie chart)
-  - Returns timeline data (for line chart)
+  - Fetches daily emotion counts from Supabase (pre-aggregated)
+  - Sums them into an emotion distribution (for pie chart)
+  - Returns per-day timeline data (for line chart)
 """
 
+import logging
+
 from fastapi import APIRouter, HTTPException
-from collections import Counter
 from db import get_mood_history
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -21,11 +24,11 @@ async def get_mood(user_id: str, days: int = 30):
     
     Returns:
         - distribution: emotion counts for pie chart
-        - timeline: mood entries over time for line chart
+        - timeline: per-day emotion counts for line chart
         - total_entries: total number of mood logs
     """
     try:
-        mood_data = get_mood_history(user_id, days=days)
+        mood_data = await get_mood_history(user_id, days=days)
         
         if not mood_data:
             return {
@@ -35,16 +38,18 @@ async def get_mood(user_id: str, days: int = 30):
                 "message": "No mood data yet. Start chatting to track your emotions!"
             }
         
-        # ── Compute emotion distribution (for pie chart) ──
-        emotion_counts = Counter(entry["emotion"] for entry in mood_data)
-        distribution = dict(emotion_counts.most_common())
+        # ── Sum daily counts into emotion distribution (for pie chart) ──
+        emotion_counts: dict[str, int] = {}
+        for entry in mood_data:
+            emotion_counts[entry["emotion"]] = emotion_counts.get(entry["emotion"], 0) + entry["count"]
+        distribution = dict(sorted(emotion_counts.items(), key=lambda item: item[1], reverse=True))
         
         # ── Build timeline data (for line chart) ──
         timeline = [
             {
-                "date": entry["created_at"],
+                "date": entry["day"],
                 "emotion": entry["emotion"],
-                "confidence": entry["confidence"]
+                "count": entry["count"]
             }
             for entry in mood_data
         ]
@@ -52,11 +57,11 @@ async def get_mood(user_id: str, days: int = 30):
         return {
             "distribution": distribution,
             "timeline": timeline,
-            "total_entries": len(mood_data)
+            "total_entries": sum(emotion_counts.values())
         }
         
     except Exception as e:
-        print(f"❌ Error in /mood endpoint: {e}")
+        logger.error("❌ Error in /mood endpoint: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to fetch mood data."
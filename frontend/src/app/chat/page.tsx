@@ -17,7 +17,7 @@
 import { useState, useEffect, useRef } from "react";
 import { useRouter } from "next/navigation";
 import { supabase } from "@/lib/supabase";
-import { sendMessage, ChatResponse } from "@/lib/api";
+import { streamMessage, ChatResponse } from "@/lib/api";
 import Navbar from "@/components/Navbar";
 import ChatBubble from "@/components/ChatBubble";
 import TypingIndicator from "@/components/TypingIndicator";
@@ -41,6 +41,9 @@ export default function ChatPage() {
     const [messages, setMessages] = useState<Message[]>([]);
     const [input, setInput] = useState("");
     const [isLoading, setIsLoading] = useState(false);
+    // True until the reply stream finishes; blocks sending a new message
+    // (isLoading only drives the typing indicator, cleared on first chunk)
+    const [isStreaming, setIsStreaming] = useState(false);
     const [latestEmotion, setLatestEmotion] = useState<string | null>(null);
     const [showCrisisModal, setShowCrisisModal] = useState(false);
     const [showMoodCheckIn, setShowMoodCheckIn] = useState(false);
@@ -91,7 +94,7 @@ export default function ChatPage() {
 
     // ── Send Message ──
     const handleSend = async () => {
-        if (!input.trim() || isLoading || !userId) return;
+        if (!input.trim() || isLoading || isStreaming || !userId) return;
 
         const userMessage = input.trim();
         setInput("");
@@ -108,29 +111,73 @@ export default function ChatPage() {
         };
         setMessages((prev) => [...prev, userMsg]);
         setIsLoading(true);
+        setIsStreaming(true);
 
-        try {
-            // Call backend
-            const response: ChatResponse = await sendMessage(userId, userMessage);
+        const aiMsgId = `ai-${Date.now()}`;
+        let aiMsgAdded = false;
 
-            // Update user message with detected emotion
-            setMessages((prev) =>
-                prev.map((msg) =>
-                    msg.id === userMsg.id ? { ...msg, emotion: response.emotion } : msg
-                )
-            );
+        try {
+            // Call backend (streamed)
+            const response: ChatResponse = await streamMessage(userId, userMessage, {
+                onMeta: (meta) => {
+                    // Update user message with detected emotion
+                    setMessages((prev) =>
+                        prev.map((msg) =>
+                            msg.id === userMsg.id ? { ...msg, emotion: meta.emotion } : msg
+                        )
+                    );
+                },
+                onDelta: (content) => {
+                    // Add the AI bubble on the first chunk, then grow it
+                    if (!aiMsgAdded) {
+                        aiMsgAdded = true;
+                        setIsLoading(false);
+                        setMessages((prev) => [
+                            ...prev,
+                            {
+                                id: aiMsgId,
+                                role: "assistant",
+                                message: content,
+                                timestamp: new Date().toLocaleTimeString([], {
+                                    hour: "2-digit",
+                                    minute: "2-digit",
+                                }),
+                            },
+                        ]);
+                    } else {
+                        setMessages((prev) =>
+                            prev.map((msg) =>
+                                msg.id === aiMsgId
+                                    ? { ...msg, message: msg.message + content }
+                                    : msg
+                            )
+                        );
+                    }
+                },
+            });
 
-            // Add AI response
-            const aiMsg: Message = {
-                id: `ai-${Date.now()}`,
-                role: "assistant",
-                message: response.reply,
-                timestamp: new Date().toLocaleTimeString([], {
-                    hour: "2-digit",
-                    minute: "2-digit",
-                }),
-            };
-            setMessages((prev) => [...prev, aiMsg]);
+            if (aiMsgAdded) {
+                // Replace streamed text with the final (trimmed) reply
+                setMessages((prev) =>
+                    prev.map((msg) =>
+                        msg.id === aiMsgId ? { ...msg, message: response.reply } : msg
+                    )
+                );
+            } else {
+                // No chunks arrived (e.g. empty completion): show the final reply
+                setMessages((prev) => [
+                    ...prev,
+                    {
+                        id: aiMsgId,
+                        role: "assistant",
+                        message: response.reply,
+                        timestamp: new Date().toLocaleTimeString([], {
+                            hour: "2-digit",
+                            minute: "2-digit",
+                        }),
+                    },
+                ]);
+            }
 
             // Update latest emotion for coping suggestions
             setLatestEmotion(response.emotion);
@@ -155,6 +202,7 @@ export default function ChatPage() {
             ]);
         } finally {
             setIsLoading(false);
+            setIsStreaming(false);
             inputRef.current?.focus();
         }
     };
@@ -213,7 +261,7 @@ export default function ChatPage() {
                             />
                             <button
                                 onClick={handleSend}
-                                disabled={!input.trim() || isLoading}
+                                disabled={!input.trim() || isLoading || isStreaming}
                                 className="w-10 h-10 rounded-xl bg-gradient-to-r from-purple-600 to-violet-600 flex items-center justify-center text-white shadow-lg shadow-purple-500/25 hover:shadow-purple-500/40 transition-all disabled:opacity-50 disabled:cursor-not-allowed hover:scale-105 active:scale-95 flex-shrink-0"
                             >
                                 <Send className="w-4 h-4" />
@@ -101,13 +101,13 @@ export default function DashboardPage() {
         ? (() => {
             const grouped: Record<string, Record<string, number>> = {};
             moodData.timeline.forEach((entry) => {
-                const date = new Date(entry.date).toLocaleDateString("en-US", {
+                const date = new Date(`${entry.date}T00:00:00`).toLocaleDateString("en-US", {
                     month: "short",
                     day: "numeric",
                 });
                 if (!grouped[date]) grouped[date] = {};
                 grouped[date][entry.emotion] =
-                    (grouped[date][entry.emotion] || 0) + 1;
+                    (grouped[date][entry.emotion] || 0) + entry.count;
             });
             return Object.entries(grouped).map(([date, emotions]) => ({
                 date,
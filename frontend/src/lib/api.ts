@@ -19,9 +19,9 @@ export interface ChatResponse {
 export interface MoodData {
     distribution: Record<string, number>;
     timeline: Array<{
-        date: string;
+        date: string; // YYYY-MM-DD (UTC day)
         emotion: string;
-        confidence: number;
+        count: number;
     }>;
     total_entries: number;
     message?: string;
@@ -29,21 +29,73 @@ export interface MoodData {
 
 // ─── Chat API ───────────────────────────────────────────────────
 
-export async function sendMessage(
+export interface ChatStreamMeta {
+    emotion: string;
+    confidence: number;
+    crisis: boolean;
+}
+
+/**
+ * Stream a chat reply from POST /chat/stream (Server-Sent Events).
+ * Calls onMeta once emotion/crisis are known, then onDelta for each
+ * piece of the reply. Resolves with the full ChatResponse when done.
+ */
+export async function streamMessage(
     userId: string,
-    message: string
+    message: string,
+    handlers: {
+        onMeta?: (meta: ChatStreamMeta) => void;
+        onDelta?: (content: string) => void;
+    } = {}
 ): Promise<ChatResponse> {
-    const response = await fetch(`${API_URL}/chat`, {
+    const response = await fetch(`${API_URL}/chat/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ user_id: userId, message }),
     });
 
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
         throw new Error(`Chat API error: ${response.status}`);
     }
 
-    return response.json();
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let meta: ChatStreamMeta | null = null;
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary: number;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            for (const line of rawEvent.split("\n")) {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            }
+            const payload = JSON.parse(data);
+
+            if (event === "meta") {
+                meta = payload;
+                handlers.onMeta?.(payload);
+            } else if (event === "delta") {
+                handlers.onDelta?.(payload.content);
+            } else if (event === "done" && meta) {
+                return { ...meta, reply: payload.reply };
+            } else if (event === "error") {
+                throw new Error(payload.detail);
+            }
+        }
+    }
+
+    throw new Error("Chat stream ended unexpectedly");
 }
 
 // ─── Mood API ───────────────────────────────────────────────────
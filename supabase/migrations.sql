@@ -16,9 +16,14 @@ CREATE TABLE IF NOT EXISTS chats (
     role        TEXT NOT NULL CHECK (role IN ('user', 'assistant')),
     message     TEXT NOT NULL,
     emotion     TEXT,
-    created_at  TIMESTAMPTZ DEFAULT NOW()
+    created_at  TIMESTAMPTZ DEFAULT NOW() NOT NULL
 );
 
+-- Timestamps come from the database clock only (backend never sends them);
+-- re-applied here for tables created by earlier versions of this script
+ALTER TABLE chats ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE chats ALTER COLUMN created_at SET NOT NULL;
+
 -- Index for fast lookups by user
 CREATE INDEX IF NOT EXISTS idx_chats_user_id ON chats(user_id);
 CREATE INDEX IF NOT EXISTS idx_chats_created_at ON chats(created_at);
@@ -32,12 +37,17 @@ CREATE TABLE IF NOT EXISTS mood_logs (
     user_id     TEXT NOT NULL,
     emotion     TEXT NOT NULL,
     confidence  FLOAT NOT NULL CHECK (confidence >= 0 AND confidence <= 1),
-    created_at  TIMESTAMPTZ DEFAULT NOW()
+    created_at  TIMESTAMPTZ DEFAULT NOW() NOT NULL
 );
 
+ALTER TABLE mood_logs ALTER COLUMN created_at SET DEFAULT NOW();
+ALTER TABLE mood_logs ALTER COLUMN created_at SET NOT NULL;
+
 -- Index for fast lookups by user and date range
 CREATE INDEX IF NOT EXISTS idx_mood_logs_user_id ON mood_logs(user_id);
 CREATE INDEX IF NOT EXISTS idx_mood_logs_created_at ON mood_logs(created_at);
+-- Serves mood_daily's live-rows branch (one user's not-yet-materialized rows)
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_created_at ON mood_logs(user_id, created_at);
 
 -- ═══════════════════════════════════════════════════════════
 -- TABLE: journal_entries
@@ -53,6 +63,86 @@ CREATE TABLE IF NOT EXISTS journal_entries (
 
 CREATE INDEX IF NOT EXISTS idx_journal_user_id ON journal_entries(user_id);
 
+-- ═══════════════════════════════════════════════════════════
+-- FUNCTION: insert_chat_turn
+-- Persists one full chat turn (user message, AI reply, mood log)
+-- in a single transaction, so the backend needs only one request.
+-- Called via PostgREST: POST /rest/v1/rpc/insert_chat_turn
+-- ═══════════════════════════════════════════════════════════
+CREATE OR REPLACE FUNCTION insert_chat_turn(
+    p_user_id     TEXT,
+    p_user_msg    TEXT,
+    p_ai_msg      TEXT,
+    p_emotion     TEXT,
+    p_confidence  FLOAT
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    -- clock_timestamp() (not NOW()) so the reply sorts after the user message
+    INSERT INTO chats (user_id, role, message, emotion, created_at)
+    VALUES (p_user_id, 'user', p_user_msg, p_emotion, clock_timestamp());
+
+    INSERT INTO chats (user_id, role, message, emotion, created_at)
+    VALUES (p_user_id, 'assistant', p_ai_msg, NULL, clock_timestamp());
+
+    INSERT INTO mood_logs (user_id, emotion, confidence)
+    VALUES (p_user_id, p_emotion, p_confidence);
+$$;
+
+-- ═══════════════════════════════════════════════════════════
+-- VIEW: mood_daily
+-- Per-user, per-day emotion counts for the mood dashboard, so the
+-- backend fetches ~days × 7 rows instead of every mood log.
+--   mood_daily_mv: materialized counts for past (UTC) days, refreshed nightly
+--   mood_daily:    mood_daily_mv + live counts for rows not yet materialized
+-- ═══════════════════════════════════════════════════════════
+CREATE MATERIALIZED VIEW IF NOT EXISTS mood_daily_mv AS
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::DATE AS day,
+    emotion,
+    COUNT(*)::INT                         AS count
+FROM mood_logs
+WHERE (created_at AT TIME ZONE 'UTC')::DATE < (NOW() AT TIME ZONE 'UTC')::DATE
+GROUP BY user_id, day, emotion;
+
+-- Unique index is required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mood_daily_mv_key
+    ON mood_daily_mv(user_id, day, emotion);
+
+-- Lets mood_daily's MAX(day) lookup read one index entry instead of
+-- scanning the whole view on every query
+CREATE INDEX IF NOT EXISTS idx_mood_daily_mv_day ON mood_daily_mv(day);
+
+CREATE OR REPLACE VIEW mood_daily AS
+SELECT user_id, day, emotion, count
+FROM mood_daily_mv
+UNION ALL
+SELECT
+    user_id,
+    (created_at AT TIME ZONE 'UTC')::DATE AS day,
+    emotion,
+    COUNT(*)::INT                         AS count
+FROM mood_logs
+-- Plain range on created_at (not an expression) so the index below is used
+WHERE created_at >= (
+    SELECT COALESCE(MAX(day) + 1, '-infinity'::DATE) FROM mood_daily_mv
+)::TIMESTAMP AT TIME ZONE 'UTC'
+GROUP BY user_id, day, emotion;
+
+-- Aggregates bypass RLS, so only the backend (service role) may read them
+REVOKE ALL ON mood_daily_mv FROM anon, authenticated;
+REVOKE ALL ON mood_daily FROM anon, authenticated;
+
+-- Refresh the materialized counts nightly (pg_cron is available on Supabase)
+CREATE EXTENSION IF NOT EXISTS pg_cron;
+SELECT cron.schedule(
+    'refresh-mood-daily',
+    '5 0 * * *',
+    'REFRESH MATERIALIZED VIEW CONCURRENTLY mood_daily_mv'
+);
+
 -- ═══════════════════════════════════════════════════════════
 -- ROW LEVEL SECURITY (RLS)
 -- Users can only access their own data